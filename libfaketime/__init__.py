@@ -1,7 +1,13 @@
+import argparse
+import ctypes
+import ctypes.util
 import datetime
 import functools
 import inspect
+import json
+import numbers
 import os
+import subprocess
 import sys
 import threading
 import time
@@ -18,7 +24,11 @@ from pytz import utc
 # This env var is set by reexec to ensure we don't reload more than once.
 
 _DID_REEXEC_VAR = "FAKETIME_DID_REEXEC"
+_MONOTONIC_CLOCKS = ("monotonic", "monotonic_ns", "perf_counter", "perf_counter_ns")
+_real_clocks = {name: getattr(time, name) for name in _MONOTONIC_CLOCKS}
 _FAKETIME_FMT = "%Y-%m-%d %T.%f"
+_NS_PER_SECOND = 10**9
+_EPOCH = datetime.datetime(1970, 1, 1)
 
 
 def _get_lib_path():
@@ -84,8 +94,52 @@ def get_reload_information():
     return needs_reload, env_additions
 
 
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main():  # pragma: nocover
-    """Print the necessary environment to stdout."""
+    """Print the necessary environment to stdout, or check that it works."""
+    parser = argparse.ArgumentParser(prog="python-libfaketime")
+    subparsers = parser.add_subparsers(dest="command")
+    check_parser = subparsers.add_parser(
+        "check", help="check that libfaketime is preloaded and measure its overhead"
+    )
+    check_parser.add_argument(
+        "--number",
+        type=_positive_int,
+        default=100000,
+        help="calls to time per benchmarked function",
+    )
+    check_parser.add_argument(
+        "--fake-monotonic",
+        action="store_true",
+        help="also benchmark fake_time(fake_monotonic=True) monotonic clocks",
+    )
+    args = parser.parse_args()
+
+    if args.command == "check":
+        reexec_if_needed(quiet=True)
+        report = check_preload(number=args.number, fake_monotonic=args.fake_monotonic)
+        loaded = {True: "yes", False: "no", None: "unknown"}[report["library_loaded"]]
+        print(f"library loaded: {loaded}")
+        print(f"faking works: {'yes' if report['faking_works'] else 'no'}")
+        if report["error"]:
+            print(f"benchmark failed: {report['error']}")
+        else:
+            if not report["benchmark_faked"]:
+                print("benchmark was not faked: libfaketime did not load there")
+            for name, timings in report["overhead"].items():
+                print(
+                    f"{name}: {timings['faked'] * 1e9:.0f}ns per call faked, "
+                    f"{timings['real'] * 1e9:.0f}ns without libfaketime"
+                )
+        healthy = report["faking_works"] and report["benchmark_faked"]
+        sys.exit(0 if healthy else 1)
+
     _, _env_additions = get_reload_information()
     for key, value in _env_additions.items():
         print(f'export {key}="{value}"')
@@ -109,6 +163,191 @@ def reexec_if_needed(remove_vars=True, quiet=False):
                 del os.environ[key]
 
 
+_OVERHEAD_BENCHMARK = """
+import contextlib
+import json
+import time
+import timeit
+
+from libfaketime import fake_time
+
+number = {number}
+statements = {statements!r}
+if {faked!r}:
+    context = fake_time("2000-01-01 00:00:00", fake_monotonic={fake_monotonic!r})
+else:
+    context = contextlib.nullcontext()
+
+with context:
+    results = {{"faked": time.time() == 946684800}}
+    for name, statement in statements.items():
+        results[name] = timeit.timeit(statement, "import datetime, time", number=number)
+print(json.dumps(results))
+"""
+
+
+def _is_library_mapped():
+    # Only linux exposes the loaded libraries this way.
+    if not os.path.exists("/proc/self/maps"):
+        return None
+
+    with open("/proc/self/maps") as fd:
+        return any(line.rstrip().endswith("/libfaketime.so.1") for line in fd)
+
+
+def _without_libfaketime(environ):
+    environ = environ.copy()
+    for key in ("LD_PRELOAD", "DYLD_INSERT_LIBRARIES"):
+        if key in environ:
+            kept = [lib for lib in environ[key].split(":") if "libfaketime" not in lib]
+            if kept:
+                environ[key] = ":".join(kept)
+            else:
+                del environ[key]
+    return environ
+
+
+def _run_overhead_benchmark(environ, statements, number, faked, fake_monotonic):
+    code = _OVERHEAD_BENCHMARK.format(
+        statements=statements,
+        number=number,
+        faked=faked,
+        fake_monotonic=fake_monotonic,
+    )
+    # Make sure the subprocess imports this copy of the package.
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    pythonpath = os.pathsep.join(filter(None, [package_dir, environ.get("PYTHONPATH")]))
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=dict(environ, PYTHONPATH=pythonpath),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    timings = json.loads(output)
+    faked = timings.pop("faked")
+    return faked, {name: total / number for name, total in timings.items()}
+
+
+def check_preload(number=100000, fake_monotonic=False):
+    """Check that libfaketime is really preloaded, and measure what it costs.
+
+    Returns a dict with:
+
+    - ``library_loaded``: whether libfaketime is mapped into this process, or
+      None where that cannot be checked (macOS).
+    - ``faking_works``: whether a fake_time spec changes time.time() here.
+    - ``benchmark_faked``: whether time was really faked in the benchmark
+      subprocess that runs with libfaketime, or None if it failed.
+    - ``overhead``: seconds per call of time.time() and datetime.now(), plus
+      time.monotonic() and time.perf_counter() with ``fake_monotonic``. They
+      are timed in subprocesses inside fake_time (``faked``) and without
+      libfaketime (``real``), or None if a benchmark subprocess failed.
+    - ``error``: the output of a failed benchmark subprocess, or None.
+    """
+    if number < 1:
+        raise ValueError("'number' must be at least 1.")
+
+    with fake_time("2000-01-01 00:00:00", only_main_thread=False):
+        faking_works = time.time() == 946684800
+
+    _, env_additions = get_reload_information()
+    statements = {
+        "time.time()": "time.time()",
+        "datetime.now()": "datetime.datetime.now()",
+    }
+    if fake_monotonic:
+        statements["time.monotonic()"] = "time.monotonic()"
+        statements["time.perf_counter()"] = "time.perf_counter()"
+    report = {
+        "library_loaded": _is_library_mapped(),
+        "faking_works": faking_works,
+        "benchmark_faked": None,
+        "overhead": None,
+        "error": None,
+    }
+
+    try:
+        benchmark_faked, faked = _run_overhead_benchmark(
+            dict(os.environ, **env_additions),
+            statements,
+            number,
+            faked=True,
+            fake_monotonic=fake_monotonic,
+        )
+        _, real = _run_overhead_benchmark(
+            _without_libfaketime(os.environ),
+            statements,
+            number,
+            faked=False,
+            fake_monotonic=False,
+        )
+    except subprocess.CalledProcessError as e:
+        report["error"] = e.stderr.strip() or str(e)
+        return report
+
+    report["benchmark_faked"] = benchmark_faked
+    report["overhead"] = {
+        name: {"faked": faked[name], "real": real[name]} for name in faked
+    }
+    return report
+
+
+class _timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+@functools.cache
+def _get_real_clock_gettime():
+    # Looking the symbol up through libc's own handle skips the preloaded
+    # libfaketime definition.
+    libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    clock_gettime = libc.clock_gettime
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_timespec)]
+    clock_gettime.restype = ctypes.c_int
+    return clock_gettime
+
+
+def real_clock_gettime_ns(clock_id):
+    """Read a clock in nanoseconds, bypassing libfaketime."""
+    ts = _timespec()
+    if _get_real_clock_gettime()(clock_id, ctypes.byref(ts)) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return ts.tv_sec * _NS_PER_SECOND + ts.tv_nsec
+
+
+def real_time():
+    """Return the real time.time(), even inside fake_time."""
+    return real_clock_gettime_ns(time.CLOCK_REALTIME) / _NS_PER_SECOND
+
+
+def real_monotonic():
+    """Return the real time.monotonic(), even when fake_time fakes it.
+
+    This is meant for profilers and other code that needs to measure elapsed
+    time while running under fake_time.
+    """
+    return _real_clocks["monotonic"]()
+
+
+def real_perf_counter():
+    """Return the real time.perf_counter(), even when fake_time fakes it."""
+    return _real_clocks["perf_counter"]()
+
+
+def _is_ns(value):
+    return isinstance(value, numbers.Integral) and not isinstance(value, bool)
+
+
+def _delta_to_ns(delta):
+    if isinstance(delta, datetime.timedelta):
+        return delta // datetime.timedelta(microseconds=1) * 1000
+    if _is_ns(delta):
+        return int(delta)
+    raise TypeError(f"Expected a timedelta or integer nanoseconds, got {delta!r}")
+
+
 def begin_callback(instance):
     """Execute custom code just before faking the time."""
     pass
@@ -126,31 +365,66 @@ class fake_time:
         only_main_thread=True,
         tz_offset=None,
         timestamp_file=None,
+        fake_monotonic=False,
     ):
         self.only_main_thread = only_main_thread
+        self.fake_monotonic = fake_monotonic
         self.timezone_str = "UTC"
         if tz_offset is not None:
             self.timezone_str = f"Etc/GMT{-tz_offset:+}"
 
-        if not datetime_spec and not timestamp_file:
+        if datetime_spec is None and not timestamp_file:
             raise ValueError(
                 "Either 'datetime_spec' or 'timestamp_file' must be passed."
             )
 
-        self.time_to_freeze = datetime_spec
+        if fake_monotonic and datetime_spec is None:
+            raise ValueError("'fake_monotonic' needs a 'datetime_spec'.")
+
         self.timestamp_file = timestamp_file
 
-        if isinstance(datetime_spec, str):
+        if isinstance(datetime_spec, bool):
+            raise TypeError("'datetime_spec' cannot be a bool.")
+
+        if _is_ns(datetime_spec):
+            # Integer specs are nanoseconds since the epoch, in UTC.
+            self._tzinfo = None
+            self._freeze_ns = (
+                _delta_to_ns(datetime_spec) + (tz_offset or 0) * 3600 * _NS_PER_SECOND
+            )
+        elif isinstance(datetime_spec, str):
             self.time_to_freeze = utc.localize(
                 dateutil.parser.parse(datetime_spec)
             ).astimezone(timezone(self.timezone_str))
-        elif isinstance(datetime_spec, datetime.datetime):
-            if datetime_spec.tzinfo:
-                if tz_offset is not None:
-                    raise Exception(
-                        "Cannot set tz_offset when datetime already has timezone"
-                    )
-                self.timezone_str = datetime_spec.tzinfo.tzname(datetime_spec)
+        else:
+            if isinstance(datetime_spec, datetime.datetime):
+                if datetime_spec.tzinfo:
+                    if tz_offset is not None:
+                        raise Exception(
+                            "Cannot set tz_offset when datetime already has timezone"
+                        )
+                    self.timezone_str = datetime_spec.tzinfo.tzname(datetime_spec)
+            self.time_to_freeze = datetime_spec
+
+    @property
+    def time_to_freeze(self):
+        if self._freeze_ns is None:
+            return None
+        wall = _EPOCH + datetime.timedelta(microseconds=self._freeze_ns // 1000)
+        return wall.replace(tzinfo=self._tzinfo)
+
+    @time_to_freeze.setter
+    def time_to_freeze(self, value):
+        # The frozen time is kept as integer nanoseconds of wall-clock time in
+        # timezone_str, which is what libfaketime parses out of FAKETIME.
+        if value is None:
+            self._tzinfo = None
+            self._freeze_ns = None
+        else:
+            if not isinstance(value, datetime.datetime):
+                value = datetime.datetime.combine(value, datetime.time())
+            self._tzinfo = value.tzinfo
+            self._freeze_ns = _delta_to_ns(value.replace(tzinfo=None) - _EPOCH)
 
     def _should_fake(self):
         return (
@@ -175,21 +449,107 @@ class fake_time:
 
         return None
 
-    def _format_datetime(self, _datetime):
-        return _datetime.strftime(_FAKETIME_FMT)
+    def _format_ns(self, ns):
+        seconds, nanoseconds = divmod(ns, _NS_PER_SECOND)
+        formatted = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+        if not nanoseconds:
+            return f"{formatted}.000000000"
+        # libfaketime reads the fraction as a double and truncates it to whole
+        # nanoseconds; the trailing half nanosecond keeps it from rounding down.
+        return f"{formatted}.{nanoseconds:09d}5"
 
-    def _update_time(self, time):
+    def _update_time(self, ns):
         if not self.timestamp_file:
-            os.environ["FAKETIME"] = self._format_datetime(time)
+            os.environ["FAKETIME"] = self._format_ns(ns)
         else:
-            if time:
+            if ns is not None:
                 with open(self.timestamp_file, "w") as fd:
-                    fd.write(self._format_datetime(time))
+                    fd.write(self._format_ns(ns))
             os.environ["FAKETIME_TIMESTAMP_FILE"] = self.timestamp_file
 
     def tick(self, delta=datetime.timedelta(seconds=1)):
-        self.time_to_freeze += delta
-        self._update_time(self.time_to_freeze)
+        """Move the frozen time forward by a timedelta or integer nanoseconds."""
+        self._freeze_ns += _delta_to_ns(delta)
+        self._update_time(self._freeze_ns)
+
+    def _base_ns(self, utc):
+        if self._freeze_ns is None:
+            raise ValueError(
+                "There is no frozen time to offset from without a 'datetime_spec'."
+            )
+
+        if not utc:
+            return self._freeze_ns
+
+        # Convert the way libfaketime does: mktime with TZ set to timezone_str.
+        seconds, nanoseconds = divmod(self._freeze_ns, _NS_PER_SECOND)
+        prev_tz = os.environ.get("TZ")
+        os.environ["TZ"] = self.timezone_str
+        time.tzset()
+        try:
+            seconds = int(time.mktime(time.gmtime(seconds)[:8] + (-1,)))
+        finally:
+            if prev_tz is not None:
+                os.environ["TZ"] = prev_tz
+            else:
+                del os.environ["TZ"]
+            time.tzset()
+        return seconds * _NS_PER_SECOND + nanoseconds
+
+    def timestamps(self, offsets, utc=False):
+        """Return naive datetimes at each offset from the frozen time.
+
+        Offsets are timedeltas or integer nanoseconds, like for ``tick``. The
+        results are what datetime.now() (or datetime.utcnow() if ``utc`` is
+        set) would return after ticking by each offset, computed without
+        calling the clock. UTC conversion uses the offset at the frozen time.
+        """
+        base = self._base_ns(utc)
+        return [
+            _EPOCH + datetime.timedelta(microseconds=(base + _delta_to_ns(o)) // 1000)
+            for o in offsets
+        ]
+
+    def datetime64_array(self, offsets, utc=False):
+        """Like ``timestamps``, but return a numpy ``datetime64[ns]`` array.
+
+        Offsets can also be a numpy integer (nanoseconds) or timedelta64 array.
+        """
+        import numpy as np
+
+        offsets = np.asarray(offsets)
+        if offsets.dtype.kind == "O":
+            # Lists of timedeltas, checked like timestamps() does.
+            offsets = np.array(
+                [_delta_to_ns(o) for o in offsets.flat], dtype=np.int64
+            ).reshape(offsets.shape)
+        elif offsets.dtype.kind not in "ium":
+            raise TypeError(
+                f"Expected timedelta or integer nanosecond offsets, got {offsets.dtype}"
+            )
+        return np.datetime64(self._base_ns(utc), "ns") + offsets.astype(
+            "timedelta64[ns]"
+        )
+
+    def _patch_monotonic(self):
+        # libfaketime can only report the frozen wall-clock time on monotonic
+        # clocks, which breaks sleeps and timeouts. Patch the python functions
+        # instead, anchored to the real clocks and moved only by tick.
+        self._backup_monotonic = {}
+        for name in ("monotonic", "perf_counter"):
+            ns_name = f"{name}_ns"
+            self._backup_monotonic[name] = getattr(time, name)
+            self._backup_monotonic[ns_name] = getattr(time, ns_name)
+            anchor = getattr(time, ns_name)() - self._freeze_ns
+
+            def fake_clock_ns(anchor=anchor):
+                return anchor + self._freeze_ns
+
+            def fake_clock(anchor=anchor):
+                return (anchor + self._freeze_ns) / _NS_PER_SECOND
+
+            setattr(time, ns_name, fake_clock_ns)
+            setattr(time, name, fake_clock)
 
     def __enter__(self):
         if self._should_fake():
@@ -202,9 +562,12 @@ class fake_time:
             os.environ["TZ"] = self.timezone_str
 
             time.tzset()
-            self._update_time(self.time_to_freeze)
+            self._update_time(self._freeze_ns)
             os.environ["FAKETIME_FMT"] = _FAKETIME_FMT
 
+            if self.fake_monotonic:
+                self._patch_monotonic()
+
         func_name = self._should_patch_uuid()
         if func_name:
             self._backup_uuid_generate_time = getattr(uuid, func_name)
@@ -218,6 +581,10 @@ class fake_time:
             setattr(uuid, func_name, self._backup_uuid_generate_time)
 
         if self._should_fake():
+            if self.fake_monotonic:
+                for name, func in self._backup_monotonic.items():
+                    setattr(time, name, func)
+
             if self._prev_tz is not None:
                 os.environ["TZ"] = self._prev_tz
             else:
@@ -86,6 +86,9 @@ setup(
         "python-dateutil >= 1.3",
         "pytz",  # for pytz.timezone and pytz.utc
     ],
+    extras_require={
+        "numpy": ["numpy"],  # for fake_time.datetime64_array
+    },
     classifiers=[
         "License :: OSI Approved :: GNU General Public License v2 (GPLv2)",
         "Development Status :: 5 - Production/Stable",
@@ -1,10 +1,12 @@
 import datetime
 import os
+import threading
 import time
 import uuid
 from unittest.mock import patch
 
 import pytest
+from pytz import timezone
 
 import libfaketime
 from libfaketime import fake_time
@@ -18,6 +20,48 @@ class TestReexec:
         with pytest.raises(RuntimeError):
             libfaketime.reexec_if_needed()
 
+    def test_check_preload(self):
+        report = libfaketime.check_preload(number=100)
+
+        assert report["library_loaded"] is not False
+        assert report["faking_works"]
+        assert report["benchmark_faked"]
+        assert report["error"] is None
+        assert set(report["overhead"]) == {"time.time()", "datetime.now()"}
+        for timings in report["overhead"].values():
+            assert timings["faked"] > 0
+            assert timings["real"] > 0
+
+    def test_check_preload_fake_monotonic(self):
+        report = libfaketime.check_preload(number=100, fake_monotonic=True)
+
+        assert report["benchmark_faked"]
+        assert "time.monotonic()" in report["overhead"]
+        assert "time.perf_counter()" in report["overhead"]
+
+    def test_check_preload_rejects_no_calls(self):
+        with pytest.raises(ValueError):
+            libfaketime.check_preload(number=0)
+
+    def test_check_preload_reports_unfaked_benchmark(self):
+        environ = libfaketime._without_libfaketime(os.environ)
+        with patch.object(
+            libfaketime, "get_reload_information", return_value=(False, {})
+        ):
+            with patch.dict(os.environ, environ, clear=True):
+                report = libfaketime.check_preload(number=100)
+
+        assert report["benchmark_faked"] is False
+        assert report["error"] is None
+
+    def test_check_preload_reports_benchmark_errors(self):
+        with patch.object(libfaketime.sys, "executable", "/bin/false"):
+            report = libfaketime.check_preload(number=100)
+
+        assert report["overhead"] is None
+        assert report["benchmark_faked"] is None
+        assert report["error"]
+
 
 class TestFaketime:
     def _assert_time_not_faked(self):
@@ -70,6 +114,99 @@ class TestFaketime:
             datetime.datetime(2014, 1, 1, microsecond=123456) == datetime.datetime.now()
         )
 
+    @fake_time(1_000_000_000_123_456_789)
+    def test_fake_time_has_nanosecond_granularity(self):
+        assert 1_000_000_000_123_456_789 == time.time_ns()
+        assert 1_000_000_000_123_456_789 == time.clock_gettime_ns(time.CLOCK_REALTIME)
+
+    def test_fake_time_accepts_nanosecond_epochs(self):
+        with fake_time(946720805_000_000_000) as fake:
+            assert datetime.datetime(2000, 1, 1, 10, 0, 5) == datetime.datetime.now()
+            assert datetime.datetime(2000, 1, 1, 10, 0, 5) == fake.time_to_freeze
+
+        with fake_time(946720805_000_000_000, tz_offset=3):
+            assert datetime.datetime(2000, 1, 1, 13, 0, 5) == datetime.datetime.now()
+            assert datetime.datetime(2000, 1, 1, 10, 0, 5) == datetime.datetime.utcnow()
+
+    def test_fake_time_accepts_numpy_nanosecond_epochs(self):
+        np = pytest.importorskip("numpy")
+
+        with fake_time(np.int64(946720805_000_000_000)) as fake:
+            fake.tick(np.int64(1))
+            assert 946720805_000_000_001 == time.time_ns()
+            assert type(fake._freeze_ns) is int
+
+    def test_fake_time_rejects_bools(self):
+        with pytest.raises(TypeError):
+            fake_time(True)
+
+        with fake_time(946720805_000_000_000) as fake:
+            with pytest.raises(TypeError):
+                fake.tick(True)
+
+    @fake_time(datetime.date(2000, 1, 2))
+    def test_fake_time_accepts_dates(self):
+        assert datetime.datetime(2000, 1, 2) == datetime.datetime.now()
+
+    def test_fake_time_tick_nanoseconds(self):
+        with fake_time(1_000_000_000_000_000_000) as fake:
+            fake.tick(1)
+            assert 1_000_000_000_000_000_001 == time.time_ns()
+            fake.tick(delta=datetime.timedelta(microseconds=1))
+            assert 1_000_000_000_000_001_001 == time.time_ns()
+
+    def test_timestamps_match_ticked_now(self):
+        offsets = [0, datetime.timedelta(seconds=5), 1_500, -3_600_000_000_000]
+        with fake_time("2000-01-01 10:00:05", tz_offset=3) as fake:
+            stamps = fake.timestamps(offsets)
+            utc_stamps = fake.timestamps(offsets, utc=True)
+
+            for offset, stamp, utc_stamp in zip(offsets, stamps, utc_stamps):
+                with fake_time("2000-01-01 10:00:05", tz_offset=3) as ticked:
+                    ticked.tick(offset)
+                    assert stamp == datetime.datetime.now()
+                    assert utc_stamp == datetime.datetime.utcnow()
+
+    @pytest.mark.parametrize(
+        "tz_name,frozen",
+        [
+            ("US/Eastern", datetime.datetime(2000, 6, 1, 12)),
+            ("Europe/Brussels", datetime.datetime(2017, 1, 2, 15, 2)),
+        ],
+    )
+    def test_timestamps_utc_with_aware_spec(self, tz_name, frozen):
+        with fake_time(timezone(tz_name).localize(frozen)) as fake:
+            assert fake.timestamps([0], utc=True) == [datetime.datetime.utcnow()]
+
+    def test_datetime64_array(self):
+        np = pytest.importorskip("numpy")
+
+        fake = fake_time(datetime.datetime(2000, 1, 1, 10, 0, 5))
+        stamps = fake.datetime64_array(np.arange(3) * 1_000_000_001)
+        assert stamps.dtype == np.dtype("datetime64[ns]")
+        assert list(stamps) == [
+            np.datetime64("2000-01-01T10:00:05.000000000"),
+            np.datetime64("2000-01-01T10:00:06.000000001"),
+            np.datetime64("2000-01-01T10:00:07.000000002"),
+        ]
+
+        stamps = fake.datetime64_array([datetime.timedelta(hours=1)], utc=True)
+        assert list(stamps) == [np.datetime64("2000-01-01T11:00:05", "ns")]
+
+        with pytest.raises(TypeError):
+            fake.datetime64_array([0.0, 1.5, 3.0])
+        with pytest.raises(TypeError):
+            fake.datetime64_array(np.array([True]))
+        with pytest.raises(TypeError):
+            fake.datetime64_array([datetime.timedelta(0), 1.5])
+
+    def test_timestamps_need_a_frozen_time(self, tmpdir):
+        fake = fake_time(timestamp_file=str(tmpdir / "faketime.rc"))
+        with pytest.raises(ValueError):
+            fake.timestamps([0])
+        with pytest.raises(ValueError):
+            fake.timestamps([0], utc=True)
+
     def test_nested_fake_time(self):
         self._assert_time_not_faked()
 
@@ -90,18 +227,52 @@ class TestFaketime:
     def test_monotonic_not_mocked(self):
         assert os.environ["DONT_FAKE_MONOTONIC"] == "1"
 
+    def test_monotonic_follows_fake_time(self):
+        real_start = libfaketime.real_monotonic()
+        with fake_time("2000-01-01 10:00:05", fake_monotonic=True) as fake:
+            start, perf_start = time.monotonic(), time.perf_counter()
+            start_ns = time.monotonic_ns()
+            assert 0 <= start - real_start < 60
+            time.sleep(0.01)
+            assert time.monotonic() == start
+
+            fake.tick(delta=datetime.timedelta(minutes=5))
+            assert time.monotonic() - start == pytest.approx(300)
+            assert time.perf_counter() - perf_start == pytest.approx(300)
+            assert time.monotonic_ns() - start_ns == 300 * 10**9
+            assert 0 <= libfaketime.real_monotonic() - real_start < 60
+
+        assert 0 <= time.monotonic() - real_start < 60
+
+    def test_fake_monotonic_keeps_waits_working(self):
+        lock = threading.Lock()
+        lock.acquire()
+        real_start = libfaketime.real_monotonic()
+        with fake_time("2000-01-01 10:00:05", fake_monotonic=True):
+            time.sleep(0.01)
+            assert not threading.Event().wait(0.01)
+            assert not lock.acquire(timeout=0.01)
+        assert libfaketime.real_monotonic() - real_start < 5
+
+    def test_real_clocks_are_not_faked(self):
+        before = libfaketime.real_time()
+        with fake_time("2000-01-01 10:00:05"):
+            assert time.time() == 946720805
+            assert before <= libfaketime.real_time() < before + 60
+            assert abs(libfaketime.real_monotonic() - time.monotonic()) < 60
+
     def test_timestmap_file(self, tmpdir):
         file_path = str(tmpdir / "faketime.rc")
 
         with fake_time("2000-01-01 10:00:05", timestamp_file=file_path) as fake:
             assert datetime.datetime(2000, 1, 1, 10, 0, 5) == datetime.datetime.now()
             with open(file_path) as fd:
-                assert fd.read() == "2000-01-01 10:00:05.000000"
+                assert fd.read() == "2000-01-01 10:00:05.000000000"
 
             fake.tick(delta=datetime.timedelta(hours=1))
             assert datetime.datetime(2000, 1, 1, 11, 0, 5) == datetime.datetime.now()
             with open(file_path) as fd:
-                assert fd.read() == "2000-01-01 11:00:05.000000"
+                assert fd.read() == "2000-01-01 11:00:05.000000000"
 
         with fake_time(timestamp_file=file_path):
             assert datetime.datetime(2000, 1, 1, 11, 0, 5) == datetime.datetime.now()